@@ -1,5 +1,5 @@
 import { NextResponse } from 'next/server';
-import { generateText } from '@/lib/openrouter-api';
+import { streamText } from '@/lib/openrouter-api';
 import { getQuiz } from '@/lib/actions';
 
 export async function POST(req: Request) {
@@ -56,13 +56,14 @@ Provide a clear, helpful response that:
 
 Your response should be friendly and encouraging while maintaining academic rigor.`;
 
-    // Generate the chat response
-    const response = await generateText(prompt, { 
-      responseFormat: "text",
+    // Stream the chat response back as it is generated
+    const stream = await streamText(prompt, { 
       temperature: 0.7
     });
 
-    return NextResponse.json({ response: response.trim() });
+    return new Response(stream, {
+      headers: { 'Content-Type': 'text/plain; charset=utf-8' }
+    });
   } catch (error) {
     console.error('Chat API error:', error);
     return NextResponse.json(
@@ -30,6 +30,36 @@ function formatFeedback(text: string): string {
     .replace(/int/g, '\\int');
 }
 
+// Fixed evaluation instructions, kept ahead of the per-request answer so
+// every request shares the same prompt prefix
+const EVALUATION_INSTRUCTIONS = `
+    You are a YRDSB teacher evaluating a student's answer. Review the student's answer below and assess their understanding of the concept. Focus on the key ideas rather than an exact word-for-word match with the correct answer. Evaluate whether the response demonstrates a reasonable grasp of the topic, and provide constructive feedback if there are misunderstandings or missing elements.
+    
+    Evaluate the student's answer based on these criteria:
+    1. Semantic understanding - Does the answer demonstrate understanding of the core concept, even if using different wording?
+    2. Key points - Are the main ideas present, even if expressed differently?
+    3. Accuracy - Is the information factually correct?
+    
+    Provide a JSON response in this exact format:
+    {
+      "score": number between 0 and 1,
+      "correct": boolean,
+      "feedback": "string explaining the evaluation"
+    }
+    
+    Guidelines:
+    - Score 1.0: Shows clear understanding of the concept, even if worded differently
+    - Score 0.8-0.9: Good understanding with minor gaps or slightly imprecise explanation
+    - Score 0.6-0.7: Basic understanding present but could be more complete
+    - Score 0.4-0.5: Some understanding but significant gaps
+    - Score 0.0-0.3: Major misunderstandings or incorrect concepts
+    
+    Focus on whether they understand the concept rather than exact wording matches.
+    Be lenient with variations in terminology if the core understanding is demonstrated.
+    Consider synonyms and alternative valid ways of expressing the same concept.
+
+    Important: Your response MUST be valid JSON. Do not include any markdown formatting or code blocks.`;
+
 export async function POST(request: Request) {
   try {
     const { questionId, questionText, studentAnswer, correctAnswer, questionType } = await request.json();
@@ -54,37 +84,11 @@ export async function POST(request: Request) {
     }
 
     // For short answer questions, use AI evaluation
-    const prompt = `
-    You are a YRDSB teacher evaluating a student's answer. Review the student's answer below and assess their understanding of the concept. Focus on the key ideas rather than an exact word-for-word match with the correct answer. Evaluate whether the response demonstrates a reasonable grasp of the topic, and provide constructive feedback if there are misunderstandings or missing elements.
+    const prompt = `${EVALUATION_INSTRUCTIONS}
 
     Question: ${questionText}
     Student's Answer: ${studentAnswer}
     Expected Answer: ${correctAnswer}
-    
-    Evaluate the student's answer based on these criteria:
-    1. Semantic understanding - Does the answer demonstrate understanding of the core concept, even if using different wording?
-    2. Key points - Are the main ideas present, even if expressed differently?
-    3. Accuracy - Is the information factually correct?
-    
-    Provide a JSON response in this exact format:
-    {
-      "score": number between 0 and 1,
-      "correct": boolean,
-      "feedback": "string explaining the evaluation"
-    }
-    
-    Guidelines:
-    - Score 1.0: Shows clear understanding of the concept, even if worded differently
-    - Score 0.8-0.9: Good understanding with minor gaps or slightly imprecise explanation
-    - Score 0.6-0.7: Basic understanding present but could be more complete
-    - Score 0.4-0.5: Some understanding but significant gaps
-    - Score 0.0-0.3: Major misunderstandings or incorrect concepts
-    
-    Focus on whether they understand the concept rather than exact wording matches.
-    Be lenient with variations in terminology if the core understanding is demonstrated.
-    Consider synonyms and alternative valid ways of expressing the same concept.
-
-    Important: Your response MUST be valid JSON. Do not include any markdown formatting or code blocks.
     `;
 
     let result;
@@ -92,7 +96,8 @@ export async function POST(request: Request) {
       result = await generateText(prompt, {
         temperature: 0.3,
         maxTokens: 1000,
-        responseFormat: "json"
+        responseFormat: "json",
+        cache: true
       });
     } catch (error) {
       console.error('Error generating AI response:', error);
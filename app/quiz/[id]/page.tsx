@@ -1,8 +1,14 @@
 import { getQuiz } from "@/lib/actions"
 import { QuizClient } from "./quiz-client"
+import { QuizPending } from "./quiz-pending"
 
 export default async function QuizPage({ params }: { params: { id: string } }) {
   const quizData = await getQuiz(params.id);
+
+  // Questions are generated in the background after upload
+  if (quizData.status === "pending" || quizData.status === "failed") {
+    return <QuizPending error={quizData.error} />;
+  }
   
   return <QuizClient initialQuiz={quizData} quizId={params.id} />;
 }
@@ -193,8 +193,9 @@ export function QuizClient({ initialQuiz, quizId }: QuizClientProps) {
 
   const getUnansweredQuestions = () => {
     return quiz.questions
-      .filter(q => !selectedAnswers[q.id] || !selectedAnswers[q.id].text)
-      .map(q => quiz.questions.indexOf(q) + 1);
+      .map((q, index) => ({ q, number: index + 1 }))
+      .filter(({ q }) => !selectedAnswers[q.id] || !selectedAnswers[q.id].text)
+      .map(({ number }) => number);
   };
 
   const handleSubmitQuiz = () => {
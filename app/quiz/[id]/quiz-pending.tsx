@@ -0,0 +1,52 @@
+"use client"
+
+import { useEffect } from "react"
+import { useRouter } from "next/navigation"
+import Link from "next/link"
+import { Loader2, AlertCircle } from "lucide-react"
+import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card"
+import { Button } from "@/components/ui/button"
+
+// How often to check whether the quiz has finished generating
+const POLL_INTERVAL_MS = 2000
+
+interface QuizPendingProps {
+  error?: string;
+}
+
+export function QuizPending({ error }: QuizPendingProps) {
+  const router = useRouter();
+
+  // Re-render the server page until the quiz is ready or has failed
+  useEffect(() => {
+    if (error) return;
+
+    const timer = setInterval(() => router.refresh(), POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
+  }, [error, router]);
+
+  return (
+    <div className="container mx-auto py-8 px-4 relative min-h-screen">
+      <Card className="max-w-3xl mx-auto">
+        <CardHeader>
+          <CardTitle>{error ? "Quiz Generation Failed" : "Generating Your Quiz"}</CardTitle>
+          <CardDescription>
+            {error ? error : "Creating questions from your notes. This can take up to a minute."}
+          </CardDescription>
+        </CardHeader>
+        <CardContent className="flex flex-col items-center gap-6 py-8">
+          {error ? (
+            <>
+              <AlertCircle className="h-12 w-12 text-red-500" />
+              <Button asChild>
+                <Link href="/">Try Again</Link>
+              </Button>
+            </>
+          ) : (
+            <Loader2 className="h-12 w-12 animate-spin text-muted-foreground" />
+          )}
+        </CardContent>
+      </Card>
+    </div>
+  );
+}
@@ -68,6 +68,7 @@ export function Chatbot({ quizId }: ChatbotProps) {
     const newUserMessage: Message = { role: 'user', content: input };
     setMessages(prev => [...prev, newUserMessage]);
     setInput('');
+    let hasPlaceholder = false;
 
     try {
       const response = await fetch('/api/chat', {
@@ -81,20 +82,37 @@ export function Chatbot({ quizId }: ChatbotProps) {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to get response');
       }
 
-      const data = await response.json();
-      const assistantMessage: Message = { role: 'assistant', content: data.response };
-      setMessages(prev => [...prev, assistantMessage]);
+      // Render the reply as it streams in
+      setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
+      hasPlaceholder = true;
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let content = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        content += value;
+        const partial = content.trimStart();
+        setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content: partial }]);
+      }
+
+      if (!content.trim()) {
+        throw new Error('Empty response');
+      }
     } catch (error) {
       console.error('Chat error:', error);
       const errorMessage: Message = {
         role: 'assistant',
         content: 'I apologize, but I encountered an error. Please try again or rephrase your question.'
       };
-      setMessages(prev => [...prev, errorMessage]);
+      // Replace the empty or partial streamed reply so it never becomes
+      // part of the conversation history sent on the next turn
+      setMessages(prev => hasPlaceholder
+        ? [...prev.slice(0, -1), errorMessage]
+        : [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
     }
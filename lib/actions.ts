@@ -2,7 +2,7 @@
  * Server-side actions for quiz generation
  * 
  * Key Functions:
- * - createQuiz: Generates quiz from PDF notes
+ * - createQuiz: Reads PDF notes and queues quiz generation
  * - getQuiz: Retrieves quiz by ID
  * - submitQuizAnswers: Processes quiz submissions
  * - getQuizResults: Retrieves quiz results
@@ -24,6 +24,9 @@
 
 "use server"
 
+import { promises as fs } from "fs"
+import path from "path"
+import { z } from "zod"
 import { createClient } from "@/lib/supabase/server"
 import { getCurrentUser } from "@/lib/server-auth"
 import { extractTextFromPDF } from "@/lib/pdf-utils"
@@ -33,9 +36,13 @@ import { QuizResult, QuizQuestion as QuizQuestionType } from "./types"
 // Maximum file size in bytes (20MB)
 const MAX_FILE_SIZE = 20 * 1024 * 1024
 
-// Quiz storage with persistence
-let quizStore: { [key: string]: QuizData } = {};
-let pastQuizzesStore: {
+// How long a quiz may stay pending before generation is treated as failed (3 minutes)
+const QUIZ_GENERATION_TIMEOUT_MS = 3 * 60 * 1000
+
+// Location of the persisted quiz data
+const QUIZ_DATA_PATH = path.join(process.cwd(), '.quiz-data.json');
+
+interface PastQuiz {
   id: string;
   title: string;
   subject: string;
@@ -43,52 +50,82 @@ let pastQuizzesStore: {
   topic: string;
   createdAt: string;
   totalQuestions: number;
-}[] = [];
+}
+
+// Quiz storage with persistence
+interface QuizDataStore {
+  quizzes: { [key: string]: QuizData };
+  pastQuizzes: PastQuiz[];
+  // Pending writes, chained so saves land in order and never interleave
+  saveQueue: Promise<void>;
+  // Resolves once the persisted data has been read
+  loaded: Promise<void>;
+}
+
+// Next compiles this module separately for server actions and for server
+// components and route handlers, so one process can hold several copies of
+// it. Keeping the store on globalThis gives every copy the same data.
+const globalForQuizData = globalThis as typeof globalThis & { studyAiQuizData?: QuizDataStore };
+
+function createQuizDataStore(): QuizDataStore {
+  const store: QuizDataStore = {
+    quizzes: {},
+    pastQuizzes: [],
+    saveQueue: Promise.resolve(),
+    loaded: Promise.resolve()
+  };
+  store.loaded = loadQuizData(store);
+  return store;
+}
 
 // Load quiz data from file if it exists
-function loadQuizData() {
+async function loadQuizData(store: QuizDataStore) {
   try {
-    const fs = require('fs');
-    const path = require('path');
-    const dataPath = path.join(process.cwd(), '.quiz-data.json');
-    
-    if (fs.existsSync(dataPath)) {
-      const data = JSON.parse(fs.readFileSync(dataPath, 'utf8'));
-      quizStore = data.quizzes || {};
-      pastQuizzesStore = data.pastQuizzes || [];
-      console.log('Loaded quiz data:', {
-        quizCount: Object.keys(quizStore).length,
-        pastQuizCount: pastQuizzesStore.length
-      });
+    const data = JSON.parse(await fs.readFile(QUIZ_DATA_PATH, 'utf8'));
+    store.quizzes = data.quizzes || {};
+    // Keep past quizzes newest first; files saved by this module are
+    // already in order, so this is a single linear pass for them. Older
+    // files may have entries without a createdAt; those sort last
+    store.pastQuizzes = (data.pastQuizzes || []).sort(
+      (a: { createdAt?: string }, b: { createdAt?: string }) => (b.createdAt ?? "").localeCompare(a.createdAt ?? "")
+    );
+    console.log('Loaded quiz data:', {
+      quizCount: Object.keys(store.quizzes).length,
+      pastQuizCount: store.pastQuizzes.length
+    });
+  } catch (error: any) {
+    if (error?.code !== 'ENOENT') {
+      console.error('Error loading quiz data:', error);
     }
-  } catch (error) {
-    console.error('Error loading quiz data:', error);
   }
 }
 
 // Save quiz data to file
-function saveQuizData() {
-  try {
-    const fs = require('fs');
-    const path = require('path');
-    const dataPath = path.join(process.cwd(), '.quiz-data.json');
-    
-    fs.writeFileSync(dataPath, JSON.stringify({
-      quizzes: quizStore,
-      pastQuizzes: pastQuizzesStore
-    }, null, 2));
-    
-    console.log('Saved quiz data:', {
-      quizCount: Object.keys(quizStore).length,
-      pastQuizCount: pastQuizzesStore.length
-    });
-  } catch (error) {
-    console.error('Error saving quiz data:', error);
-  }
+function saveQuizData(): Promise<void> {
+  // Snapshot now so later mutations don't leak into this write
+  const snapshot = JSON.stringify({
+    quizzes: store.quizzes,
+    pastQuizzes: store.pastQuizzes
+  }, null, 2);
+  const counts = {
+    quizCount: Object.keys(store.quizzes).length,
+    pastQuizCount: store.pastQuizzes.length
+  };
+
+  store.saveQueue = store.saveQueue.then(async () => {
+    try {
+      await fs.writeFile(QUIZ_DATA_PATH, snapshot);
+      console.log('Saved quiz data:', counts);
+    } catch (error) {
+      console.error('Error saving quiz data:', error);
+    }
+  });
+
+  return store.saveQueue;
 }
 
-// Initialize quiz data on module load
-loadQuizData();
+// The first copy of this module to load creates the store and reads the file
+const store = globalForQuizData.studyAiQuizData ??= createQuizDataStore();
 
 interface QuizQuestion {
   id: string;
@@ -130,18 +167,109 @@ interface QuizData {
   createdAt: number;
   totalQuestions: number;
   results?: QuizResults;
+  status?: "pending" | "ready" | "failed";
+  error?: string;
 }
 
+// Number of questions requested per category; missing fields count as zero
+const questionDistributionSchema = z.object({
+  multipleChoice: z.coerce.number().int().min(0),
+  knowledge: z.coerce.number().int().min(0),
+  thinking: z.coerce.number().int().min(0),
+  application: z.coerce.number().int().min(0),
+  communication: z.coerce.number().int().min(0)
+});
+
+type QuestionDistribution = z.infer<typeof questionDistributionSchema>;
+
+// Fixed prompt instructions. Each prompt starts with one of these and ends
+// with the per-request details, so requests share an identical prefix that
+// the model provider can serve from its prompt cache.
+const QUIZ_GENERATION_INSTRUCTIONS = `You are a Highschool teacher at York Region District School Board creating a test.
+
+CRITICAL: You MUST generate COMPLETELY NEW NEVER MADE BEFORE questions according to the exact question distribution given below.
+Question categories:
+1. Multiple Choice Questions
+   - Focus on basic concept understanding and recall
+   - Each must have exactly 4 options (A, B, C, D)
+
+2. Knowledge Questions
+   - Short answer format
+   - Test recall and basic understanding
+   - Focus on definitions, formulas, and basic concepts
+
+3. Thinking Questions
+   - Short answer format
+   - Test problem-solving and analytical skills
+   - Include multi-step problems and reasoning
+
+4. Application Questions
+   - Short answer format
+   - Test real-world applications
+   - Include word problems and practical scenarios
+
+5. Communication Questions
+   - Short answer format
+   - Test explanation and justification
+   - Ask students to explain their reasoning or process
+
+Response Format (MUST be valid JSON), using the grade, subject and topic given below:
+{
+  "title": "Grade <grade> <topic> Quiz",
+  "subject": "<subject>",
+  "grade": "<grade>",
+  "topic": "<topic>",
+  "questions": [
+    {
+      "id": "1",
+      "type": "multipleChoice",
+      "category": "Multiple Choice",
+      "text": "Question text here",
+      "options": [
+        "A) First option",
+        "B) Second option",
+        "C) Third option",
+        "D) Fourth option"
+      ],
+      "answer": "A) First option",
+      "explanation": "Step-by-step explanation"
+    }
+  ]
+}`;
+
+const BATCH_GRADING_INSTRUCTIONS = `You are an expert teacher evaluating a student's answers.
+
+Evaluate every answer below and provide a JSON response in this format:
+{
+  "evaluations": [
+    {
+      "id": "question ID",
+      "score": number between 0 and 1,
+      "correct": boolean,
+      "feedback": "string explaining why the answer is correct or incorrect"
+    }
+  ]
+}`;
+
+const GRADING_INSTRUCTIONS = `You are an expert teacher evaluating a student's answer.
+
+Evaluate the answer below and provide a JSON response in this format:
+{
+  "score": number between 0 and 1,
+  "correct": boolean,
+  "feedback": "string explaining why the answer is correct or incorrect"
+}`;
+
 // Helper function to escape LaTeX in JSON
 function escapeLatexForJson(text: string) {
   return text.replace(/\\/g, '\\\\');
 }
 
 // Helper function to clear quiz store
-function clearQuizStore() {
-  quizStore = {};
-  pastQuizzesStore = [];
-  saveQuizData();
+async function clearQuizStore() {
+  store.quizzes = {};
+  store.pastQuizzes = [];
+  await saveQuizData();
 }
 
 // Helper function to convert LaTeX commands to actual symbols
@@ -193,14 +321,22 @@ export async function createQuiz(formData: FormData): Promise<string> {
     
     // Get and validate form data
     const notesFiles = formData.getAll("notes") as File[];
+    const pastTestFile = formData.get("pastTest") as File | null;
     const grade = formData.get("grade")?.toString() || "11";
     
-    // Get question distribution
-    const multipleChoice = parseInt(formData.get("multipleChoice")?.toString() || "0", 10);
-    const knowledge = parseInt(formData.get("knowledge")?.toString() || "0", 10);
-    const thinking = parseInt(formData.get("thinking")?.toString() || "0", 10);
-    const application = parseInt(formData.get("application")?.toString() || "0", 10);
-    const communication = parseInt(formData.get("communication")?.toString() || "0", 10);
+    // Get and validate question distribution
+    const parsedDistribution = questionDistributionSchema.safeParse({
+      multipleChoice: formData.get("multipleChoice"),
+      knowledge: formData.get("knowledge"),
+      thinking: formData.get("thinking"),
+      application: formData.get("application"),
+      communication: formData.get("communication")
+    });
+    if (!parsedDistribution.success) {
+      throw new Error("Question counts must be whole numbers of zero or more");
+    }
+    const distribution = parsedDistribution.data;
+    const { multipleChoice, knowledge, thinking, application, communication } = distribution;
 
     // Calculate total questions
     const numQuestions = multipleChoice + knowledge + thinking + application + communication;
@@ -227,25 +363,20 @@ export async function createQuiz(formData: FormData): Promise<string> {
       throw new Error("No notes files were uploaded");
     }
 
-    // Extract text from PDF files with more content
-    const notesText: string[] = [];
-    let totalCharacters = 0;
-    
-    for (const file of notesFiles) {
-      try {
-        console.log(`\nProcessing file: ${file.name}`);
-        const text = await extractTextFromPDF(file);
-        if (!text || text.trim().length === 0) {
-          throw new Error("No text could be extracted from the PDF. Please ensure the PDF contains readable text and try again.");
-        }
-        totalCharacters += text.length;
-        console.log(`- Extracted ${text.length} characters`);
-        notesText.push(text);
-      } catch (error) {
-        console.error(`Error processing ${file.name}:`, error);
-        throw new Error(`Failed to process ${file.name}. ${error instanceof Error ? error.message : 'Please ensure it\'s a valid PDF with readable text.'}`);
-      }
+    // Enforce the same per-file size limit as the upload form, since server
+    // actions can be called directly
+    const oversizedFile = [...notesFiles, ...(pastTestFile ? [pastTestFile] : [])]
+      .find(file => file.size > MAX_FILE_SIZE);
+    if (oversizedFile) {
+      throw new Error(`File "${oversizedFile.name}" is too large. Maximum file size is 20MB.`);
     }
+
+    // Extract text from all PDF files, including the past test, concurrently
+    const [notesText, pastTestText] = await Promise.all([
+      Promise.all(notesFiles.map(extractNotesText)),
+      pastTestFile ? extractPastTestText(pastTestFile) : Promise.resolve("")
+    ]);
+    const totalCharacters = notesText.reduce((sum, text) => sum + text.length, 0);
     
     console.log(`\nTotal characters extracted: ${totalCharacters}`);
     
@@ -253,188 +384,257 @@ export async function createQuiz(formData: FormData): Promise<string> {
       throw new Error("No text could be extracted from any of the uploaded files. Please ensure your PDFs contain readable text and try again.");
     }
 
-    // Determine subject from notes content
-    console.log("\nDetermining subject...");
-    const subject = await determineSubject(notesText.join("\n"));
-    console.log(`- Determined subject: ${subject}`);
+    // Register the quiz as pending and generate it in the background so
+    // the request returns as soon as the notes have been read
+    await store.loaded;
+    const quizId = `quiz-${Date.now()}`;
+    store.quizzes[quizId] = {
+      title: "Generating quiz...",
+      subject: "",
+      grade: grade,
+      topic: "",
+      questions: [],
+      createdAt: Date.now(),
+      totalQuestions: 0,
+      status: "pending"
+    };
+    await saveQuizData();
+
+    // Give up on generation that hangs so the quiz page stops waiting
+    let timeout: ReturnType<typeof setTimeout> | undefined;
+    Promise.race([
+      generateQuiz(quizId, notesText, pastTestText, grade, distribution),
+      new Promise<never>((_, reject) => {
+        timeout = setTimeout(
+          () => reject(new Error("Quiz generation timed out. Please try again.")),
+          QUIZ_GENERATION_TIMEOUT_MS
+        );
+      })
+    ])
+      .catch(async (error) => {
+        console.error("\n=== Quiz Generation Failed ===");
+        console.error(error);
+        await markQuizFailed(quizId, error instanceof Error ? error.message : "Failed to generate quiz. Please try again.");
+      })
+      .finally(() => clearTimeout(timeout));
+
+    console.log(`Queued quiz generation with ID: ${quizId}`);
+    return quizId;
+  } catch (error) {
+    console.error("\n=== Quiz Generation Failed ===");
+    console.error(error);
+    throw error;
+  }
+}
 
-    // Determine specific topic with more context
-    console.log("\nDetermining topic...");
-    const topic = await determineTopic(notesText.join("\n"), subject);
-    console.log(`- Determined topic: ${topic}`);
-    console.log(`\nGenerating ${numQuestions} questions for ${subject} > ${topic} (Grade ${grade})`);
+/**
+ * Marks a pending quiz as failed, leaving quizzes that already finished alone
+ */
+async function markQuizFailed(quizId: string, error: string) {
+  const quiz = store.quizzes[quizId];
+  if (!quiz || quiz.status !== "pending") {
+    return;
+  }
 
-    // Generate quiz using DeepSeek with increased tokens
-    console.log("\nGenerating quiz with DeepSeek...");
-    const fullNotesText = notesText.join("\n").substring(0, 3000);
-    
-    console.log("Preparing quiz generation prompt...");
-    const prompt = `
-    You are a Highschool teacher at York Region District School Board creating a Grade ${grade} test.
-    
-    CRITICAL: You MUST generate COMPLETELY NEW NEVER MADE BEFORE questions according to this exact distribution:
-    1. Multiple Choice Questions: ${multipleChoice} questions
-       - Focus on basic concept understanding and recall
-       - Each must have exactly 4 options (A, B, C, D)
-    
-    2. Knowledge Questions: ${knowledge} questions
-       - Short answer format
-       - Test recall and basic understanding
-       - Focus on definitions, formulas, and basic concepts
-    
-    3. Thinking Questions: ${thinking} questions
-       - Short answer format
-       - Test problem-solving and analytical skills
-       - Include multi-step problems and reasoning
-    
-    4. Application Questions: ${application} questions
-       - Short answer format
-       - Test real-world applications
-       - Include word problems and practical scenarios
-    
-    5. Communication Questions: ${communication} questions
-       - Short answer format
-       - Test explanation and justification
-       - Ask students to explain their reasoning or process
+  store.quizzes[quizId] = { ...quiz, status: "failed", error };
+  await saveQuizData();
+}
+
+/**
+ * Extracts text from one notes file, failing if it has no readable text
+ */
+async function extractNotesText(file: File): Promise<string> {
+  try {
+    console.log(`\nProcessing file: ${file.name}`);
+    const text = await extractTextFromPDF(file);
+    if (!text || text.trim().length === 0) {
+      throw new Error("No text could be extracted from the PDF. Please ensure the PDF contains readable text and try again.");
+    }
+    console.log(`- Extracted ${text.length} characters from ${file.name}`);
+    return text;
+  } catch (error) {
+    console.error(`Error processing ${file.name}:`, error);
+    throw new Error(`Failed to process ${file.name}. ${error instanceof Error ? error.message : 'Please ensure it\'s a valid PDF with readable text.'}`);
+  }
+}
+
+/**
+ * Extracts text from the optional past test. The past test only guides
+ * question style, so a file that can't be read is skipped, not fatal.
+ */
+async function extractPastTestText(file: File): Promise<string> {
+  try {
+    console.log(`\nProcessing past test: ${file.name}`);
+    const text = await extractTextFromPDF(file);
+    console.log(`- Extracted ${text.length} characters from ${file.name}`);
+    return text;
+  } catch (error) {
+    console.error(`Error processing past test ${file.name}, continuing without it:`, error);
+    return "";
+  }
+}
+
+/**
+ * Generates the questions for a pending quiz and stores the result
+ * @param quizId ID of the pending quiz entry
+ * @param notesText Text extracted from each notes file
+ * @param pastTestText Text extracted from the past test, or an empty string
+ * @param grade Grade level of the quiz
+ * @param distribution Number of questions to generate per category
+ */
+async function generateQuiz(
+  quizId: string,
+  notesText: string[],
+  pastTestText: string,
+  grade: string,
+  distribution: QuestionDistribution
+): Promise<void> {
+  const { multipleChoice, knowledge, thinking, application, communication } = distribution;
+  const numQuestions = multipleChoice + knowledge + thinking + application + communication;
+
+  // Determine subject from notes content
+  console.log("\nDetermining subject...");
+  const subject = await determineSubject(notesText.join("\n"));
+  console.log(`- Determined subject: ${subject}`);
+
+  // Determine specific topic with more context
+  console.log("\nDetermining topic...");
+  const topic = await determineTopic(notesText.join("\n"), subject);
+  console.log(`- Determined topic: ${topic}`);
+  console.log(`\nGenerating ${numQuestions} questions for ${subject} > ${topic} (Grade ${grade})`);
+
+  // Generate quiz using DeepSeek with increased tokens
+  console.log("\nGenerating quiz with DeepSeek...");
+  const fullNotesText = notesText.join("\n").substring(0, 3000);
+  
+  console.log("Preparing quiz generation prompt...");
+  const prompt = `${QUIZ_GENERATION_INSTRUCTIONS}
+
+Grade: ${grade}
+Subject: ${subject}
+Topic: ${topic}
+
+Question Distribution:
+1. Multiple Choice Questions: ${multipleChoice} questions
+2. Knowledge Questions: ${knowledge} questions
+3. Thinking Questions: ${thinking} questions
+4. Application Questions: ${application} questions
+5. Communication Questions: ${communication} questions
+Total: ${numQuestions} questions
+
+Base all questions on these notes:
+${fullNotesText}${pastTestText ? `
+
+Match the style and difficulty of this past test, without reusing its questions:
+${pastTestText.substring(0, 2000)}` : ""}`;
+
+  console.log("Making quiz generation request...");
+  console.log("Prompt length:", prompt.length);
+  
+  let quizText;
+  try {
+    quizText = await generateText(prompt, {
+      temperature: 0.3,
+      maxTokens: 3000
+    });
+    console.log("Quiz generation response received!");
+    console.log("Response length:", quizText.length);
+  } catch (error) {
+    console.error("Error in quiz generation request:", error);
+    throw new Error("Failed to generate quiz questions. Please try again.");
+  }
+
+  // Process quiz response
+  console.log("\nProcessing quiz response...");
+  try {
+    // Clean up the response
+    quizText = quizText.trim();
+    if (quizText.includes('```')) {
+      quizText = quizText.replace(/```json\n|\n```|```/g, '').trim();
+    }
+
+    // Find JSON boundaries
+    const startIndex = quizText.indexOf('{');
+    const endIndex = quizText.lastIndexOf('}');
     
-    Total: ${numQuestions} questions
+    if (startIndex === -1 || endIndex === -1 || startIndex >= endIndex) {
+      throw new Error("Invalid JSON format in response");
+    }
     
-    Base all questions on these notes:
-    ${fullNotesText}
+    // Extract and parse JSON
+    quizText = quizText.slice(startIndex, endIndex + 1);
+    const quiz = JSON.parse(quizText) as QuizData;
     
-    Response Format (MUST be valid JSON):
-    {
-      "title": "Grade ${grade} ${topic} Quiz",
-      "subject": "${subject}",
-      "grade": "${grade}",
-      "topic": "${topic}",
-      "questions": [
-        {
-          "id": "1",
-          "type": "multipleChoice",
-          "category": "Multiple Choice",
-          "text": "Question text here",
-          "options": [
-            "A) First option",
-            "B) Second option",
-            "C) Third option",
-            "D) Fourth option"
-          ],
-          "answer": "A) First option",
-          "explanation": "Step-by-step explanation"
-        }
-      ]
-    }`;
-
-    console.log("Making quiz generation request...");
-    console.log("Prompt length:", prompt.length);
+    // Validate quiz structure
+    if (!quiz.title || !quiz.subject || !quiz.grade || !Array.isArray(quiz.questions)) {
+      throw new Error("Invalid quiz structure");
+    }
     
-    let quizText;
-    try {
-      quizText = await generateText(prompt, {
-        temperature: 0.3,
-        maxTokens: 3000
-      });
-      console.log("Quiz generation response received!");
-      console.log("Response length:", quizText.length);
-    } catch (error) {
-      console.error("Error in quiz generation request:", error);
-      throw new Error("Failed to generate quiz questions. Please try again.");
+    // Ensure we have at least some questions
+    if (quiz.questions.length === 0) {
+      throw new Error("No questions generated");
     }
 
-    // Process quiz response
-    console.log("\nProcessing quiz response...");
-    try {
-      // Clean up the response
-      quizText = quizText.trim();
-      if (quizText.includes('```')) {
-        quizText = quizText.replace(/```json\n|\n```|```/g, '').trim();
-      }
+    // Log the actual question count for debugging
+    console.log(`Generated ${quiz.questions.length} questions (expected ${numQuestions})`);
 
-      // Find JSON boundaries
-      const startIndex = quizText.indexOf('{');
-      const endIndex = quizText.lastIndexOf('}');
-      
-      if (startIndex === -1 || endIndex === -1 || startIndex >= endIndex) {
-        throw new Error("Invalid JSON format in response");
-      }
-      
-      // Extract and parse JSON
-      quizText = quizText.slice(startIndex, endIndex + 1);
-      const quiz = JSON.parse(quizText) as QuizData;
-      
-      // Validate quiz structure
-      if (!quiz.title || !quiz.subject || !quiz.grade || !Array.isArray(quiz.questions)) {
-        throw new Error("Invalid quiz structure");
-      }
-      
-      // Ensure we have at least some questions
-      if (quiz.questions.length === 0) {
-        throw new Error("No questions generated");
-      }
+    // Update validation to check category counts
+    const questionsByCategory = {
+      multipleChoice: quiz.questions.filter(q => q.type === "multipleChoice").length,
+      knowledge: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Knowledge").length,
+      thinking: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Thinking").length,
+      application: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Application").length,
+      communication: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Communication").length
+    };
 
-      // Log the actual question count for debugging
-      console.log(`Generated ${quiz.questions.length} questions (expected ${numQuestions})`);
+    console.log("Questions by category:", questionsByCategory);
 
-      // Update validation to check category counts
-      const questionsByCategory = {
-        multipleChoice: quiz.questions.filter(q => q.type === "multipleChoice").length,
-        knowledge: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Knowledge").length,
-        thinking: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Thinking").length,
-        application: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Application").length,
-        communication: quiz.questions.filter(q => q.type === "shortAnswer" && q.category === "Communication").length
-      };
+    // Convert LaTeX commands to actual symbols
+    quiz.questions = quiz.questions.map(q => ({
+      ...q,
+      text: convertLatexToSymbols(q.text),
+      options: q.options?.map(convertLatexToSymbols),
+      answer: convertLatexToSymbols(q.answer),
+      explanation: q.explanation ? convertLatexToSymbols(q.explanation) : undefined,
+      rubric: q.rubric ? convertLatexToSymbols(q.rubric) : undefined
+    }));
 
-      console.log("Questions by category:", questionsByCategory);
-
-      // Convert LaTeX commands to actual symbols
-      quiz.questions = quiz.questions.map(q => ({
-        ...q,
-        text: convertLatexToSymbols(q.text),
-        options: q.options?.map(convertLatexToSymbols),
-        answer: convertLatexToSymbols(q.answer),
-        explanation: q.explanation ? convertLatexToSymbols(q.explanation) : undefined,
-        rubric: q.rubric ? convertLatexToSymbols(q.rubric) : undefined
-      }));
-
-      // Create quiz ID and store
-      const quizId = `quiz-${Date.now()}`;
-      console.log(`\nStoring quiz with ID: ${quizId}`);
-      
-      quizStore[quizId] = {
-        ...quiz,
-        createdAt: Date.now(),
-        topic: topic,
-        subject: subject,
-        grade: grade,
-        totalQuestions: quiz.questions.length
-      };
-      
-      // Store in past materials
-      pastQuizzesStore.push({
-        id: quizId,
-        title: quiz.title,
-        subject: subject,
-        grade: grade,
-        topic: topic,
-        createdAt: new Date().toISOString(),
-        totalQuestions: quiz.questions.length
-      });
-      
-      // Save data to file
-      saveQuizData();
-      
-      console.log("=== Quiz Generation Complete ===\n");
-      return quizId;
-      
-    } catch (error) {
-      console.error("\nError processing quiz response:", error);
-      throw new Error("Failed to generate quiz. Please try again.");
+    // Store the finished quiz in place of the pending entry, unless it
+    // has already been marked as failed after timing out
+    if (store.quizzes[quizId]?.status !== "pending") {
+      console.warn(`Discarding generated quiz ${quizId}; it is no longer pending`);
+      return;
     }
+    console.log(`\nStoring quiz with ID: ${quizId}`);
+    
+    store.quizzes[quizId] = {
+      ...quiz,
+      createdAt: Date.now(),
+      topic: topic,
+      subject: subject,
+      grade: grade,
+      totalQuestions: quiz.questions.length,
+      status: "ready"
+    };
+    
+    // Store in past materials, keeping the newest quiz first
+    store.pastQuizzes.unshift({
+      id: quizId,
+      title: quiz.title,
+      subject: subject,
+      grade: grade,
+      topic: topic,
+      createdAt: new Date().toISOString(),
+      totalQuestions: quiz.questions.length
+    });
+    
+    // Save data to file
+    await saveQuizData();
+    
+    console.log("=== Quiz Generation Complete ===\n");
   } catch (error) {
-    console.error("\n=== Quiz Generation Failed ===");
-    console.error(error);
-    throw error;
+    console.error("\nError processing quiz response:", error);
+    throw new Error("Failed to generate quiz. Please try again.");
   }
 }
 
@@ -463,7 +663,8 @@ async function determineSubject(notesText: string): Promise<string> {
     console.log("Making subject determination request...");
     const response = await generateText(subjectPrompt, {
       temperature: 0.1, // Lower temperature for more consistent responses
-      maxTokens: 50
+      maxTokens: 50,
+      cache: true
     });
     
     console.log("Raw subject response:", response);
@@ -523,7 +724,8 @@ async function determineTopic(notesText: string, subject: string): Promise<strin
     console.log("Making topic determination request...");
     const response = await generateText(topicPrompt, {
       temperature: 0.3,
-      maxTokens: 200
+      maxTokens: 200,
+      cache: true
     });
     
     console.log("Raw topic response:", response);
@@ -703,16 +905,22 @@ export async function getQuiz(id: string) {
   console.log("Getting quiz with ID:", id);
   
   try {
-    // Reload quiz data to ensure we have the latest
-    loadQuizData();
+    // Every copy of this module shares the same in-memory store
+    await store.loaded;
     
     // Get quiz from store
-    const quiz = quizStore[id];
+    const quiz = store.quizzes[id];
     if (!quiz) {
       console.error("Quiz not found in store for ID:", id);
-      console.log("Available quiz IDs:", Object.keys(quizStore));
+      console.log("Available quiz IDs:", Object.keys(store.quizzes));
       throw new Error("Quiz not found");
     }
+
+    // Report quizzes left pending past the deadline, e.g. by a server
+    // restart, as failed; the stored entry is left untouched
+    if (quiz.status === "pending" && Date.now() - quiz.createdAt > QUIZ_GENERATION_TIMEOUT_MS) {
+      return { ...quiz, status: "failed" as const, error: "Quiz generation timed out. Please try again." };
+    }
     
     // Validate quiz structure before returning
     if (!quiz.questions || !Array.isArray(quiz.questions)) {
@@ -832,11 +1040,17 @@ function generateOverallFeedback(results: QuizResults): string {
   return 'You may want to review the material and try again.';
 }
 
+// Index questions by ID so per-answer lookups don't rescan the quiz
+function indexQuestionsById(quiz: QuizData): Map<string, QuizQuestion> {
+  return new Map(quiz.questions.map(q => [q.id, q]));
+}
+
 function identifyReviewTopics(results: QuizResults, quiz: QuizData): string[] {
   const reviewTopics: string[] = [];
+  const questionsById = indexQuestionsById(quiz);
   for (const [questionId, answer] of Object.entries(results.answers)) {
     if (!answer.isCorrect) {
-      const question = quiz.questions.find(q => q.id === questionId);
+      const question = questionsById.get(questionId);
       if (question) {
         reviewTopics.push(question.text || 'General concepts');
       }
@@ -847,9 +1061,10 @@ function identifyReviewTopics(results: QuizResults, quiz: QuizData): string[] {
 
 function identifyStrengths(results: QuizResults, quiz: QuizData): string[] {
   const strengths: string[] = [];
+  const questionsById = indexQuestionsById(quiz);
   for (const [questionId, answer] of Object.entries(results.answers)) {
     if (answer.isCorrect) {
-      const question = quiz.questions.find(q => q.id === questionId);
+      const question = questionsById.get(questionId);
       if (question) {
         strengths.push(question.text || 'General concepts');
       }
@@ -858,12 +1073,87 @@ function identifyStrengths(results: QuizResults, quiz: QuizData): string[] {
   return [...new Set(strengths)]; // Remove duplicates
 }
 
+// Short answers graded per request, and the response tokens allowed for each;
+// larger quizzes are split so no response gets truncated
+const GRADING_BATCH_SIZE = 8;
+const GRADING_TOKENS_PER_ANSWER = 500;
+
+type ShortAnswerEvaluation = { score: number; correct: boolean; feedback: string };
+
+/**
+ * Grades short answer questions in batches of GRADING_BATCH_SIZE, sending
+ * the batches concurrently
+ */
+async function gradeShortAnswers(
+  items: { question: QuizQuestion; answer: string }[]
+): Promise<Record<string, ShortAnswerEvaluation>> {
+  const batches: { question: QuizQuestion; answer: string }[][] = [];
+  for (let i = 0; i < items.length; i += GRADING_BATCH_SIZE) {
+    batches.push(items.slice(i, i + GRADING_BATCH_SIZE));
+  }
+
+  const results = await Promise.all(batches.map(gradeShortAnswerBatch));
+  return Object.assign({}, ...results);
+}
+
+/**
+ * Grades one batch of short answers in a single AI request, falling back to
+ * one request per question for anything the batch response left out
+ */
+async function gradeShortAnswerBatch(
+  items: { question: QuizQuestion; answer: string }[]
+): Promise<Record<string, ShortAnswerEvaluation>> {
+  const evaluations: Record<string, ShortAnswerEvaluation> = {};
+
+  const prompt = `${BATCH_GRADING_INSTRUCTIONS}
+
+${items.map(({ question, answer }) => `Question ID: ${question.id}
+Question: ${question.text}
+Expected Answer: ${question.answer}
+Student's Answer: ${answer}`).join('\n\n')}`;
+
+  try {
+    console.log(`Grading ${items.length} short answers in one request...`);
+    const response = await generateText(prompt, {
+      temperature: 0.3,
+      maxTokens: GRADING_TOKENS_PER_ANSWER * items.length,
+      responseFormat: "json",
+      cache: true
+    });
+
+    const parsed = JSON.parse(response);
+    for (const evaluation of parsed.evaluations || []) {
+      if (typeof evaluation?.score === 'number' &&
+          typeof evaluation?.correct === 'boolean' &&
+          typeof evaluation?.feedback === 'string') {
+        evaluations[String(evaluation.id)] = {
+          score: evaluation.score,
+          correct: evaluation.correct,
+          feedback: evaluation.feedback
+        };
+      }
+    }
+  } catch (error) {
+    console.error('Error grading short answers in batch:', error);
+  }
+
+  // Grade anything the batch missed concurrently; at most one batch's worth
+  await Promise.all(items
+    .filter(({ question }) => !evaluations[question.id])
+    .map(async ({ question, answer }) => {
+      evaluations[question.id] = await checkAnswerAction(question.id, answer, question.answer, question.type, question.text);
+    }));
+
+  return evaluations;
+}
+
 /**
  * Submits quiz answers and generates results
  */
 export async function submitQuizAnswers(quizId: string, answers: { [key: string]: string }): Promise<QuizResults> {
   try {
-    const quiz = quizStore[quizId];
+    await store.loaded;
+    const quiz = store.quizzes[quizId];
     if (!quiz) {
       throw new Error("Quiz not found");
     }
@@ -904,7 +1194,8 @@ export async function submitQuizAnswers(quizId: string, answers: { [key: string]
       submittedAt: new Date().toISOString()
     };
 
-    // Evaluate each answer
+    // Evaluate each answer, collecting short answers for a single AI request
+    const shortAnswers: { question: QuizQuestion; answer: string }[] = [];
     for (const question of quiz.questions) {
       const answer = answers[question.id];
       
@@ -928,17 +1219,22 @@ export async function submitQuizAnswers(quizId: string, answers: { [key: string]
           userAnswer: answer
         };
       } else {
-        // For short answer questions, use AI evaluation
-        const evaluation = await checkAnswerAction(question.id, answer, question.answer, question.type, question.text);
-        results.answers[question.id] = {
-          isCorrect: evaluation.correct,
-          feedback: evaluation.feedback,
-          score: evaluation.score,
-          userAnswer: answer
-        };
+        shortAnswers.push({ question, answer });
       }
     }
 
+    // For short answer questions, use AI evaluation
+    const evaluations = await gradeShortAnswers(shortAnswers);
+    for (const { question, answer } of shortAnswers) {
+      const evaluation = evaluations[question.id];
+      results.answers[question.id] = {
+        isCorrect: evaluation.correct,
+        feedback: evaluation.feedback,
+        score: evaluation.score,
+        userAnswer: answer
+      };
+    }
+
     // Calculate overall score
     const totalQuestions = quiz.questions.length;
     const totalScore = Object.values(results.answers).reduce((sum, answer) => sum + answer.score, 0);
@@ -958,7 +1254,7 @@ export async function submitQuizAnswers(quizId: string, answers: { [key: string]
 
     // Save the results
     quiz.results = results;
-    saveQuizData();
+    await saveQuizData();
 
     return results;
   } catch (error: any) {
@@ -973,25 +1269,31 @@ export async function submitQuizAnswers(quizId: string, answers: { [key: string]
  * @returns The quiz result data
  */
 export async function getQuizResults(resultId: string): Promise<QuizResult> {
-  const quiz = quizStore[resultId];
+  await store.loaded;
+  const quiz = store.quizzes[resultId];
   if (!quiz || !quiz.results) {
     throw new Error("Quiz results not found");
   }
 
-  const questions = quiz.questions.map(q => ({
-    id: q.id,
-    text: q.text,
-    type: (q.type === "multipleChoice" ? "multipleChoice" : 
-           q.category === "Knowledge" ? "knowledge" :
-           q.category === "Thinking" ? "thinking" :
-           q.category === "Application" ? "application" :
-           "communication") as QuizQuestionType["type"],
-    options: q.options,
-    correctAnswer: q.answer,
-    userAnswer: quiz.results?.answers[q.id]?.userAnswer || "",
-    isCorrect: quiz.results?.answers[q.id]?.isCorrect || false,
-    explanation: q.explanation || ""
-  }));
+  // Join each question with its graded answer in a single pass
+  const answers = quiz.results.answers;
+  const questions = quiz.questions.map(q => {
+    const answer = answers[q.id];
+    return {
+      id: q.id,
+      text: q.text,
+      type: (q.type === "multipleChoice" ? "multipleChoice" : 
+             q.category === "Knowledge" ? "knowledge" :
+             q.category === "Thinking" ? "thinking" :
+             q.category === "Application" ? "application" :
+             "communication") as QuizQuestionType["type"],
+      options: q.options,
+      correctAnswer: q.answer,
+      userAnswer: answer?.userAnswer || "",
+      isCorrect: answer?.isCorrect || false,
+      explanation: q.explanation || ""
+    };
+  });
 
   return {
     id: quiz.results.id,
@@ -1011,11 +1313,12 @@ export async function getQuizResults(resultId: string): Promise<QuizResult> {
 
 /**
  * Gets past quizzes for the current user
- * @returns List of past quizzes
+ * @returns List of past quizzes, newest first
  */
 export async function getPastQuizzes() {
   try {
-    return pastQuizzesStore;
+    await store.loaded;
+    return store.pastQuizzes;
   } catch (error: any) {
     console.error("Error getting past quizzes:", error);
     throw new Error(`Failed to get past quizzes: ${error.message}`);
@@ -1098,24 +1401,17 @@ export async function checkAnswerAction(
       };
     } else {
       // For short answer questions, use AI evaluation
-      const prompt = `
-      You are an expert teacher evaluating a student's answer.
-      
-      Question: ${questionText}
-      Expected Answer: ${correctAnswer}
-      Student's Answer: ${studentAnswer}
-      
-      Evaluate the answer and provide a JSON response in this format:
-      {
-        "score": number between 0 and 1,
-        "correct": boolean,
-        "feedback": "string explaining why the answer is correct or incorrect"
-      }`;
+      const prompt = `${GRADING_INSTRUCTIONS}
+
+Question: ${questionText}
+Expected Answer: ${correctAnswer}
+Student's Answer: ${studentAnswer}`;
 
       const response = await generateText(prompt, {
         temperature: 0.3,
         maxTokens: 500,
-        responseFormat: "json"
+        responseFormat: "json",
+        cache: true
       });
 
       const cleanResponse = response.replace(/```json\n|\n```|```/g, '').trim();
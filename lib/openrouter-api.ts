@@ -2,6 +2,9 @@
  * DeepSeek AI integration via OpenRouter API
  */
 
+import { createHash } from "crypto";
+import { LRUCache } from "@/lib/utils";
+
 /**
  * Environment configuration
  */
@@ -18,11 +21,87 @@ if (!config.apiKey) {
   console.error("Please set OPENROUTER_API_KEY or NEXT_PUBLIC_OPENROUTER_API_KEY");
 }
 
+/**
+ * Cache of completed responses keyed by a SHA-256 of the request, so
+ * identical prompts are answered without another API round trip
+ */
+const responseCache = new LRUCache<string, string>(500);
+
+// Retry settings for transient OpenRouter failures (rate limits, 5xx, network)
+const MAX_RETRIES = 3;
+const RETRY_BACKOFF_MS = 250;
+// Rate limits take far longer to clear than a dropped connection
+const RATE_LIMIT_BACKOFF_MS = 2000;
+// Give up rather than hold a request open longer than this between attempts
+const MAX_RETRY_DELAY_MS = 30000;
+
+// Headers are the same for every request, so build them once
+const requestHeaders = {
+  "Content-Type": "application/json",
+  "Authorization": `Bearer ${config.apiKey}`,
+  "HTTP-Referer": config.referrer,
+  "X-Title": config.site
+};
+
+/**
+ * Work out how long to wait before retrying. A Retry-After header (seconds
+ * or an HTTP date) wins when present; otherwise back off exponentially,
+ * starting higher for rate limits. Random jitter keeps concurrent callers
+ * from retrying in lockstep.
+ */
+function getRetryDelay(attempt: number, response?: Response): number {
+  const retryAfter = response?.headers.get("retry-after");
+  if (retryAfter) {
+    const seconds = Number(retryAfter);
+    const delay = Number.isNaN(seconds) ? Date.parse(retryAfter) - Date.now() : seconds * 1000;
+    if (!Number.isNaN(delay)) {
+      return Math.max(delay, 0);
+    }
+  }
+
+  const base = response?.status === 429 ? RATE_LIMIT_BACKOFF_MS : RETRY_BACKOFF_MS;
+  const delay = base * 2 ** attempt;
+  return delay / 2 + Math.random() * (delay / 2);
+}
+
+/**
+ * POST to the OpenRouter API, retrying rate limits and transient failures.
+ * Node's fetch keeps connections alive between calls, so retries and later
+ * requests reuse the same pooled sockets.
+ */
+async function fetchWithRetry(url: string, init: RequestInit): Promise<Response> {
+  for (let attempt = 0; ; attempt++) {
+    let delay: number;
+    try {
+      const response = await fetch(url, init);
+      if (attempt >= MAX_RETRIES || (response.status !== 429 && response.status < 500)) {
+        return response;
+      }
+      delay = getRetryDelay(attempt, response);
+      if (delay > MAX_RETRY_DELAY_MS) {
+        // Asked to wait too long; let the caller report the error instead
+        return response;
+      }
+      console.warn(`OpenRouter API returned ${response.status}, retrying in ${Math.round(delay)}ms (attempt ${attempt + 1} of ${MAX_RETRIES})...`);
+      // Drain the discarded body so its connection goes back to the pool
+      await response.body?.cancel();
+    } catch (error) {
+      if (attempt >= MAX_RETRIES) {
+        throw error;
+      }
+      delay = getRetryDelay(attempt);
+      console.warn(`OpenRouter API request failed, retrying in ${Math.round(delay)}ms (attempt ${attempt + 1} of ${MAX_RETRIES})...`, error);
+    }
+    await new Promise(resolve => setTimeout(resolve, delay));
+  }
+}
+
 interface OpenRouterRequest {
   model: string;
   messages: OpenRouterMessage[];
   temperature?: number;
   max_tokens?: number;
+  stream?: boolean;
   response_format?: {
     type: "text" | "json_object";
   };
@@ -73,12 +152,14 @@ export async function generateText(
     temperature?: number;
     maxTokens?: number;
     responseFormat?: "text" | "json";
+    cache?: boolean;
   } = {}
 ): Promise<string> {
   const { 
     temperature = 0.7, 
     maxTokens = 3000, 
-    responseFormat = "text"
+    responseFormat = "text",
+    cache = false
   } = options;
   
   console.log("\n=== Starting OpenRouter API Request ===");
@@ -93,6 +174,19 @@ export async function generateText(
     throw new Error("OpenRouter API key not configured. Please check your environment variables.");
   }
 
+  const cacheKey = cache
+    ? createHash("sha256")
+        .update(JSON.stringify([config.model, prompt, temperature, maxTokens, responseFormat]))
+        .digest("hex")
+    : "";
+  if (cache) {
+    const cached = responseCache.get(cacheKey);
+    if (cached !== undefined) {
+      console.log("Returning cached OpenRouter response");
+      return cached;
+    }
+  }
+
   // Prepare request body
   const requestBody: OpenRouterRequest = {
     model: config.model,
@@ -120,14 +214,9 @@ export async function generateText(
   try {
     console.log("Sending request to OpenRouter API...");
     
-    const response = await fetch("https://openrouter.ai/api/v1/chat/completions", {
+    const response = await fetchWithRetry("https://openrouter.ai/api/v1/chat/completions", {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-        "Authorization": `Bearer ${config.apiKey}`,
-        "HTTP-Referer": config.referrer,
-        "X-Title": config.site
-      },
+      headers: requestHeaders,
       body: JSON.stringify(requestBody)
     });
 
@@ -161,6 +250,9 @@ export async function generateText(
         const jsonStr = jsonContent.slice(startIndex, endIndex + 1);
         // Validate JSON by parsing it
         JSON.parse(jsonStr);
+        if (cache) {
+          responseCache.set(cacheKey, jsonStr);
+        }
         return jsonStr;
       } catch (error) {
         console.error("Failed to parse JSON response:", content);
@@ -168,6 +260,9 @@ export async function generateText(
       }
     }
 
+    if (cache) {
+      responseCache.set(cacheKey, content);
+    }
     return content;
   } catch (error: any) {
     console.error("Error in OpenRouter API request:", error);
@@ -175,6 +270,101 @@ export async function generateText(
   }
 }
 
+/**
+ * Stream text from DeepSeek via OpenRouter API as it is generated
+ * @returns A stream of UTF-8 encoded text chunks
+ */
+export async function streamText(
+  prompt: string,
+  options: {
+    temperature?: number;
+    maxTokens?: number;
+  } = {}
+): Promise<ReadableStream<Uint8Array>> {
+  const { 
+    temperature = 0.7, 
+    maxTokens = 3000
+  } = options;
+
+  if (!config.apiKey) {
+    throw new Error("OpenRouter API key not configured. Please check your environment variables.");
+  }
+
+  const requestBody: OpenRouterRequest = {
+    model: config.model,
+    messages: [
+      { 
+        role: "system", 
+        content: "You are a helpful AI teacher."
+      },
+      {
+        role: "user",
+        content: prompt
+      }
+    ],
+    temperature: temperature,
+    max_tokens: maxTokens,
+    stream: true
+  };
+
+  console.log("Sending streaming request to OpenRouter API...");
+  const response = await fetchWithRetry("https://openrouter.ai/api/v1/chat/completions", {
+    method: "POST",
+    headers: requestHeaders,
+    body: JSON.stringify(requestBody)
+  });
+
+  if (!response.ok || !response.body) {
+    const errorText = await response.text();
+    console.error(`OpenRouter API error response (${response.status}):`, errorText);
+    throw new Error(`OpenRouter API error (${response.status}): ${errorText}`);
+  }
+
+  // The API sends server-sent events; forward only the content deltas
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  const encoder = new TextEncoder();
+  let buffer = "";
+
+  return new ReadableStream<Uint8Array>({
+    async pull(controller) {
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+          controller.close();
+          return;
+        }
+
+        buffer += value;
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+
+        let text = "";
+        for (const line of lines) {
+          // Skip blank lines and keep-alive comments
+          if (!line.startsWith("data:")) continue;
+
+          const data = line.slice(5).trim();
+          if (data === "[DONE]") continue;
+
+          try {
+            text += JSON.parse(data).choices?.[0]?.delta?.content ?? "";
+          } catch (error) {
+            console.error("Failed to parse OpenRouter stream event:", data);
+          }
+        }
+
+        if (text) {
+          controller.enqueue(encoder.encode(text));
+          return;
+        }
+      }
+    },
+    cancel(reason) {
+      return reader.cancel(reason);
+    }
+  });
+}
+
 /**
  * Check if AI is configured
  */
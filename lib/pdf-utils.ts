@@ -5,16 +5,24 @@
  * - extractTextFromPDF: Extracts text from PDF files
  * 
  * Integrations:
- * - pdf2json
+ * - pdf-parse
  * 
  * Used By:
  * - lib/actions.ts
  * 
  * Dependencies:
- * - pdf2json
+ * - pdf-parse
  */
 
-import PDFParser from 'pdf2json';
+// Import the library entry directly; the package index runs a debug
+// self-test when it is loaded outside of a parent module
+import PDFParse from 'pdf-parse/lib/pdf-parse.js';
+import { createHash } from 'crypto';
+import { LRUCache } from '@/lib/utils';
+
+// Extracted text keyed by SHA-256 of the file contents, so the same notes
+// uploaded again (e.g. shared class notes) skip parsing entirely
+const textCache = new LRUCache<string, string>(100);
 
 /**
  * Extracts text from a PDF file
@@ -26,37 +34,19 @@ export async function extractTextFromPDF(file: File): Promise<string> {
     console.log("Starting PDF extraction for:", file.name);
     console.log("File size:", file.size, "bytes");
 
-    // Convert file to array buffer
-    const arrayBuffer = await file.arrayBuffer();
-    const buffer = Buffer.from(arrayBuffer);
-
-    // Create a new parser instance
-    const pdfParser = new PDFParser();
-
-    // Parse PDF content
-    const text = await new Promise<string>((resolve, reject) => {
-      pdfParser.on('pdfParser_dataReady', (pdfData) => {
-        try {
-          // Convert PDF data to text
-          const rawText = pdfData.Pages.map(page => 
-            page.Texts.map(text => 
-              decodeURIComponent(text.R.map(r => r.T).join(' '))
-            ).join(' ')
-          ).join('\n\n');
+    // Read the file contents; Buffer.from shares the resulting ArrayBuffer
+    // rather than copying it a second time
+    const buffer = Buffer.from(await file.arrayBuffer());
 
-          resolve(rawText);
-        } catch (error) {
-          reject(error);
-        }
-      });
+    const hash = createHash('sha256').update(buffer).digest('hex');
+    const cachedText = textCache.get(hash);
+    if (cachedText !== undefined) {
+      console.log("Using cached text for:", file.name);
+      return cachedText;
+    }
 
-      pdfParser.on('pdfParser_dataError', (error) => {
-        reject(error);
-      });
-
-      // Load PDF data
-      pdfParser.parseBuffer(buffer);
-    });
+    // Parse PDF content, extracting only the text layer of each page
+    const { text } = await PDFParse(buffer);
 
     // Clean up the extracted text
     const cleanedText = text
@@ -75,6 +65,8 @@ export async function extractTextFromPDF(file: File): Promise<string> {
     console.log("PDF extraction complete:");
     console.log("- Text length:", cleanedText.length, "characters");
 
+    textCache.set(hash, cleanedText);
+
     return cleanedText;
   } catch (error) {
     console.error("Error extracting text from PDF:", error);
@@ -1,9 +1,16 @@
 "use client"
 
-import { createClient as createSupabaseClient } from "@supabase/supabase-js"
+import { createClient as createSupabaseClient, SupabaseClient } from "@supabase/supabase-js"
 
-// Create a Supabase client for use in the browser
+// Shared browser client, created on first use
+let client: SupabaseClient | null = null
+
+// Get the Supabase client for use in the browser
 export const createClient = () => {
+  if (client) {
+    return client
+  }
+
   const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL
   const supabaseKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY
 
@@ -11,6 +18,6 @@ export const createClient = () => {
     throw new Error("Supabase URL and key must be defined")
   }
 
-  return createSupabaseClient(supabaseUrl, supabaseKey)
+  client = createSupabaseClient(supabaseUrl, supabaseKey)
+  return client
 }
-
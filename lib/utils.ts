@@ -4,3 +4,29 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Fixed-size cache that evicts the least recently used entry once full
+export class LRUCache<K, V> {
+  private entries = new Map<K, V>()
+
+  constructor(private maxSize: number) {}
+
+  get(key: K): V | undefined {
+    const value = this.entries.get(key)
+    if (value !== undefined) {
+      // Re-insert to mark as most recently used
+      this.entries.delete(key)
+      this.entries.set(key, value)
+    }
+    return value
+  }
+
+  set(key: K, value: V) {
+    this.entries.delete(key)
+    this.entries.set(key, value)
+    if (this.entries.size > this.maxSize) {
+      // Maps iterate in insertion order, so the first key is the oldest
+      this.entries.delete(this.entries.keys().next().value as K)
+    }
+  }
+}
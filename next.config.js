@@ -4,6 +4,9 @@ const nextConfig = {
     serverActions: {
       bodySizeLimit: '50mb',
     },
+    // Load PDF parsing from node_modules at runtime instead of bundling it;
+    // pdf-parse picks its pdf.js build with a dynamic require
+    serverComponentsExternalPackages: ['pdf-parse'],
   }
 }
 
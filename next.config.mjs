@@ -25,7 +25,8 @@ const nextConfig = {
     parallelServerCompiles: true,
     serverActions: {
       allowedOrigins: ["localhost:3000", "localhost:3005"]
-    }
+    },
+    serverComponentsExternalPackages: ["pdf-parse"]
   },
 }
 